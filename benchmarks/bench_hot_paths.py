@@ -0,0 +1,417 @@
+"""
+Micro-benchmarks for the CPU-side data shaping that runs on every Apify result.
+
+Apify, Google Sheets and the network are patched out; each case is fed a
+synthetic payload shaped like the real actor output. For every case and size
+the runner reports time per item and peak traced memory per item (tracemalloc
+high-water mark, measured in a separate run so it does not skew timings).
+Peak memory is not an allocation count: extra short-lived allocations that do
+not raise the high-water mark are not caught.
+
+Time per item is the fastest single run seen while repeating the case for at
+least --min-time seconds (and at least MIN_RUNS times), so sub-millisecond
+cases get thousands of runs and 100k-item cases still finish.
+
+Usage (from the repository root):
+    python benchmarks/bench_hot_paths.py --against origin/main   # CI / review
+    python benchmarks/bench_hot_paths.py --save-baseline         # local baseline
+    python benchmarks/bench_hot_paths.py                         # compare to it
+    python benchmarks/bench_hot_paths.py --sizes 1000 --threshold 0.5
+
+Timings are machine specific, so no baseline is committed. --against REF
+checks REF out into a temporary git worktree and runs it and the working tree
+in two worker processes. The workers take turns on each case for --rounds
+timing chunks, alternating which goes first, so drift during the run affects
+both sides alike. Use the merge base of the branch under review (e.g.
+`--against $(git merge-base HEAD origin/main)`).
+
+A metric regresses when it is more than --threshold (a fraction, default
+0.25) above the baseline AND above it by more than the absolute noise floor
+(--noise-floor-us / --noise-floor-bytes per item).
+
+Exit status: 1 when any metric regresses; 2 when there is no baseline to
+compare against.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing as t
+from unittest import mock
+
+# BENCH_ROOT points the imports at another checkout (used by --against)
+ROOT = os.environ.get("BENCH_ROOT") or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from werkzeug.datastructures import FileStorage
+
+import utils
+from scrapers import brandpage_reels_scraper, brandpage_tagged_scraper, hashtag_scraper, profile_scraper, youtube_scraper
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SEED = 2710
+
+# ----------------------------
+# Synthetic Apify payloads
+# ----------------------------
+def _username(rng: random.Random) -> str:
+    return "user_" + "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789_", k=rng.randint(5, 14)))
+
+def gen_hashtag_items(n: int, rng: random.Random) -> t.List[dict]:
+    """Items as returned by the hashtag actor (nested and flattened variants)."""
+    items = []
+    for i in range(n):
+        username = _username(rng)
+        caption = " ".join(rng.choices(["love", "style", "#ootd", "new", "drop", "link in bio", "✨"], k=rng.randint(3, 30)))
+        if i % 4:
+            items.append({"hashtag": "fashion", "user": {"username": username}, "caption": {"text": caption}, "link_user": f"https://www.instagram.com/{username}/"})
+        else:
+            items.append({"hashtag": "fashion", "user.username": username, "caption.text": caption, "link_user": f"https://www.instagram.com/{username}/"})
+    return items
+
+def gen_reel_items(n: int, rng: random.Random, brand_pages: t.List[str]) -> t.List[dict]:
+    """Reels as returned by the brandpage/tagged actors, ~10% duplicated."""
+    items = []
+    for i in range(n):
+        if items and rng.random() < 0.1:
+            items.append(rng.choice(items))
+            continue
+        bp = rng.choice(brand_pages)
+        owned = rng.random() < 0.5
+        owner = bp if owned else _username(rng)
+        collabs = [{"username": _username(rng)} for _ in range(rng.randint(0, 3))]
+        if not owned:
+            collabs.append({"username": bp})
+        items.append({
+            "shortCode": f"C{i:08d}",
+            "ownerUsername": owner,
+            "coauthorProducers": collabs,
+            "url": f"https://www.instagram.com/reel/C{i:08d}/",
+            "likesCount": rng.randint(0, 100_000),
+            "commentsCount": rng.randint(0, 5_000),
+            "reshareCount": rng.randint(0, 1_000),
+            "videoPlayCount": rng.randint(0, 1_000_000),
+        })
+    return items
+
+def gen_profiles(usernames: t.List[str], rng: random.Random) -> t.List[dict]:
+    """Profiles as returned by the profile actor, some with contact info in the bio."""
+    profiles = []
+    for u in usernames:
+        bio = "Creator | fashion & travel"
+        if rng.random() < 0.3:
+            bio += f"\nCollabs: {u}@gmail.com"
+        if rng.random() < 0.2:
+            bio += f"\nCall +91 98{rng.randint(10_000_000, 99_999_999)}"
+        profiles.append({"username": u, "biography": bio, "followersCount": int(rng.paretovariate(1.2) * 2_000), "postsCount": rng.randint(0, 3_000)})
+    return profiles
+
+def gen_youtube_items(n: int, rng: random.Random) -> t.List[dict]:
+    return [{"query": "unboxing", "id": f"vid{i:09d}", "channelName": _username(rng), "viewCount": rng.randint(0, 10**7)} for i in range(n)]
+
+# ----------------------------
+# Benchmark Cases
+# ----------------------------
+# Each case takes (n, rng), does all generation/patching up front and returns a
+# zero-argument callable that exercises only the code under test.
+def case_extract_row(n, rng):
+    items = gen_hashtag_items(n, rng)
+    return lambda: [hashtag_scraper.extract_row(item) for item in items]
+
+def case_scrape_hashtags(n, rng):
+    items = gen_hashtag_items(n, rng)
+    def run():
+        with mock.patch.object(hashtag_scraper, "fetch_single_hashtag", return_value=items):
+            hashtag_scraper.scrape_hashtags(["fashion"], n)
+    return run
+
+def case_brandpage_reels(n, rng):
+    brand_pages = [f"brand_{i}" for i in range(10)]
+    items = gen_reel_items(n, rng, brand_pages)
+    half = n // 2
+    responses = [items[:half], items[half:]]
+    def run():
+        payloads = iter(responses)
+        with mock.patch.object(brandpage_reels_scraper, "make_apify_request", side_effect=lambda *a, **k: next(payloads)):
+            brandpage_reels_scraper.scrape_brandpage_reels(brand_pages, n)
+    return run
+
+def case_brandpage_tagged(n, rng):
+    items = gen_reel_items(n, rng, ["brand_0"])
+    def run():
+        with mock.patch.object(brandpage_tagged_scraper, "fetch_single_brandpage_tagged", return_value=items):
+            brandpage_tagged_scraper.scrape_brandpage_tagged(["brand_0"], n)
+    return run
+
+def case_filter_profiles(n, rng, form_data=None):
+    usernames = [f"{_username(rng)}_{i}" for i in range(n)]
+    lines = ["hashtag,username,user_link,caption_text"]
+    lines.extend(f"tag_{i % 10},{u},https://www.instagram.com/{u}/,caption" for i, u in enumerate(usernames))
+    csv_content = "\n".join(lines) + "\n"
+    profiles = {p["username"]: p for p in gen_profiles(usernames, rng)}
+    def fetch(batch):
+        return [profiles[u] for u in batch]
+    def run():
+        with mock.patch.object(profile_scraper, "fetch_profiles_sync", side_effect=fetch), \
+             mock.patch.object(profile_scraper, "append_to_gsheet"):
+            profile_scraper.filter_and_scrape_profiles(csv_content, dict(form_data or {}))
+    return run
+
+def case_filter_profiles_filtered(n, rng):
+    return case_filter_profiles(n, rng, {"min_followers": "5000", "categories": ["micro", "mid-tier"], "has_email": "1"})
+
+def case_filter_profiles_capped(n, rng):
+    return case_filter_profiles(n, rng, {"max_per_query": "50"})
+
+def case_filter_profiles_capped_filtered(n, rng):
+    return case_filter_profiles(n, rng, {"max_per_query": "50", "categories": ["micro"], "has_email": "1"})
+
+def case_get_category(n, rng):
+    followers = [int(rng.paretovariate(1.2) * 2_000) for _ in range(n)]
+    return lambda: [profile_scraper.get_category(f) for f in followers]
+
+def case_youtube_keywords(n, rng):
+    items = gen_youtube_items(n, rng)
+    def run():
+        with mock.patch.object(youtube_scraper, "make_apify_request", return_value=[dict(it) for it in items]):
+            youtube_scraper.scrape_youtube_keywords(["unboxing"], n)
+    return run
+
+def case_normalize_hashtags(n, rng):
+    value = ",\n".join(f"#{_username(rng)} " if i % 2 else _username(rng) for i in range(n))
+    return lambda: utils.normalize_hashtags(value)
+
+def case_parse_csv_column(n, rng):
+    data = ("brandpage,notes\n" + "".join(f" {_username(rng)} ,x\n" for _ in range(n))).encode("utf-8")
+    def run():
+        utils.parse_csv_column(FileStorage(stream=io.BytesIO(data), filename="input.csv"), "brandpage")
+    return run
+
+CASES = {
+    "extract_row": case_extract_row,
+    "scrape_hashtags": case_scrape_hashtags,
+    "brandpage_reels": case_brandpage_reels,
+    "brandpage_tagged": case_brandpage_tagged,
+    "filter_profiles": case_filter_profiles,
+    "filter_profiles_filtered": case_filter_profiles_filtered,
+    "filter_profiles_capped": case_filter_profiles_capped,
+    "filter_profiles_capped_filtered": case_filter_profiles_capped_filtered,
+    "get_category": case_get_category,
+    "youtube_keywords": case_youtube_keywords,
+    "normalize_hashtags": case_normalize_hashtags,
+    "parse_csv_column": case_parse_csv_column,
+}
+
+# ----------------------------
+# Runner
+# ----------------------------
+MIN_RUNS = 1  # timed runs per chunk, however long a single run takes
+
+def measure_time(run: t.Callable[[], None], n: int, min_time: float, warm_up: bool = True) -> float:
+    """Return the best time per item (µs), repeating `run` for at least `min_time` seconds."""
+    if warm_up:
+        run()
+    best = float("inf")
+    runs, spent = 0, 0.0
+    # Like timeit, keep collector pauses out of the timings
+    gc.collect()
+    gc.disable()
+    try:
+        while runs < MIN_RUNS or spent < min_time:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = min(best, elapsed)
+            runs += 1
+            spent += elapsed
+    finally:
+        gc.enable()
+    return best * 1e6 / n
+
+def measure_peak(run: t.Callable[[], None], n: int) -> float:
+    """Return the tracemalloc peak bytes per item of one run."""
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / n
+
+def print_result(name: str, n: int, r: dict, label: str = ""):
+    print(f"{label}{name:<32}{n:>9,}  {r['us_per_item']:>10.3f} µs/item  {r['peak_bytes_per_item']:>10.1f} peak B/item")
+
+def run_benchmarks(names: t.List[str], sizes: t.List[int], min_time: float) -> t.Dict[str, dict]:
+    results = {}
+    for name in names:
+        for n in sizes:
+            run = CASES[name](n, random.Random(SEED))
+            r = results[f"{name}@{n}"] = {"us_per_item": measure_time(run, n, min_time), "peak_bytes_per_item": measure_peak(run, n)}
+            print_result(name, n, r)
+    return results
+
+def compare(results: t.Dict[str, dict], baseline: t.Dict[str, dict], threshold: float, floors: t.Dict[str, float]) -> t.List[str]:
+    """Return a description of every metric that regressed beyond the threshold.
+
+    A metric only counts as regressed when it is both `threshold` slower
+    (relative) and above the baseline by more than its absolute noise floor,
+    so sub-microsecond cases cannot fail on jitter alone.
+    """
+    regressions = []
+    for key, current in results.items():
+        if key not in baseline:
+            continue
+        for metric, floor in floors.items():
+            before = baseline[key].get(metric)
+            if before and current[metric] > before * (1 + threshold) and current[metric] - before > floor:
+                regressions.append(f"{key} {metric}: {before:.3f} -> {current[metric]:.3f} (+{(current[metric] / before - 1) * 100:.0f}%)")
+    return regressions
+
+# ----------------------------
+# Interleaved comparison against a git ref
+# ----------------------------
+def worker_loop():
+    """Serve measurement requests (one JSON object per line) for the tree at ROOT."""
+    cached_key, run = None, None
+    for line in sys.stdin:
+        req = json.loads(line)
+        key = (req["case"], req["n"])
+        if key != cached_key:
+            cached_key, run = key, None  # drop the previous payload before building the next
+            run = CASES[req["case"]](req["n"], random.Random(SEED))
+            run()  # warm up once per case rather than once per chunk
+        if req["metric"] == "time":
+            value = measure_time(run, req["n"], req["min_time"], warm_up=False)
+        else:
+            value = measure_peak(run, req["n"])
+        print(json.dumps({"value": value}), flush=True)
+
+class Worker:
+    """A `--worker` subprocess that imports the code under test from `root`."""
+
+    def __init__(self, root: str):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker"],
+            # A fixed hash seed keeps dict/set layouts identical between the two trees
+            env=dict(os.environ, BENCH_ROOT=root, PYTHONHASHSEED="0"), stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+
+    def ask(self, **req) -> float:
+        self.proc.stdin.write(json.dumps(req) + "\n")
+        self.proc.stdin.flush()
+        line = self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Benchmark worker for {req['case']}@{req['n']} exited unexpectedly")
+        return json.loads(line)["value"]
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+def compare_against_ref(ref: str, args) -> t.Tuple[t.Dict[str, dict], t.Dict[str, dict]]:
+    """Benchmark git `ref` and the working tree case by case; return (baseline, results).
+
+    Both trees run in long-lived worker processes. For every case the two
+    workers take turns for `--rounds` short timing chunks, swapping who goes
+    first each round. Each round gives one head/base ratio from two adjacent
+    chunks. The reported head time is the median base time scaled by the
+    median ratio, so a machine speed change that hits only some chunks does
+    not decide the result.
+    """
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    worktree = os.path.join(tmp, "tree")
+    workers = []
+    try:
+        subprocess.run(["git", "-C", ROOT, "worktree", "add", "--detach", worktree, ref], check=True, capture_output=True, text=True)
+        base, cand = Worker(worktree), Worker(ROOT)
+        workers = [base, cand]
+        baseline, results = {}, {}
+        for name in args.cases:
+            for n in args.sizes:
+                base_times, ratios = [], []
+                for round_no in range(args.rounds):
+                    timed = {}
+                    for w in (workers if round_no % 2 == 0 else workers[::-1]):
+                        timed[w] = w.ask(case=name, n=n, metric="time", min_time=args.min_time)
+                    base_times.append(timed[base])
+                    ratios.append(timed[cand] / timed[base])
+                base_time = statistics.median(base_times)
+                key = f"{name}@{n}"
+                baseline[key] = {"us_per_item": base_time, "peak_bytes_per_item": base.ask(case=name, n=n, metric="peak")}
+                results[key] = {"us_per_item": base_time * statistics.median(ratios), "peak_bytes_per_item": cand.ask(case=name, n=n, metric="peak")}
+                print_result(name, n, baseline[key], label=f"{'base':<6}")
+                print_result(name, n, results[key], label=f"{'head':<6}")
+        return baseline, results
+    finally:
+        for w in workers:
+            w.close()
+        subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", worktree], capture_output=True)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds of repeated runs per timing chunk (best run is kept)")
+    parser.add_argument("--rounds", type=int, default=15, help="alternating timing chunks per side with --against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression as a fraction of baseline")
+    parser.add_argument("--noise-floor-us", type=float, default=0.05, help="ignore slowdowns smaller than this many µs/item")
+    parser.add_argument("--noise-floor-bytes", type=float, default=16, help="ignore peak growth smaller than this many B/item")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file instead of comparing")
+    parser.add_argument("--against", metavar="REF", help="compare against git REF, interleaved in the same run, instead of reading --baseline")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        worker_loop()
+        return 0
+    if args.against and args.save_baseline:
+        parser.error("--against and --save-baseline cannot be combined")
+
+    if args.against:
+        baseline, results = compare_against_ref(args.against, args)
+    else:
+        # Without a second tree to alternate with, spend the same total time per case
+        results = run_benchmarks(args.cases, args.sizes, args.min_time * args.rounds)
+        baseline = None
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline or --against REF.")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    floors = {"us_per_item": args.noise_floor_us, "peak_bytes_per_item": args.noise_floor_bytes}
+    regressions = compare(results, baseline, args.threshold, floors)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
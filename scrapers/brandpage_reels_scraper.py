@@ -1,79 +1,93 @@
 import io
 import csv
+import time
 from flask import Blueprint, request, Response, send_file
 import logging
-from utils import make_apify_request, parse_csv_column
+from utils import make_apify_request, parse_csv_column, parse_limit
 from config import APIFY_TOKEN, BRANDPAGE_ACTOR_ID, TAGGED_ACTOR_ID
-from concurrent.futures import ThreadPoolExecutor
 
 bp_brandpage_reels = Blueprint("brandpage_reels", __name__)
 
+REELS_WAIT_BUDGET = 600  # seconds of actor waiting shared by both sequential runs
+POSTED_BY_MIN_WAIT = 60  # the posted-by run always gets at least this long
+
 def scrape_brandpage_reels(brand_pages: list, results_limit: int):
+    """Collect up to `results_limit` collaborated reels per brandpage.
+
+    The tagged actor runs first because most of its reels are collaborations.
+    The posted-by actor is then asked only for brandpages still short of the
+    limit, so it is skipped entirely when the tagged reels already cover them.
+    Because the two runs are sequential, the posted-by run only gets what is
+    left of REELS_WAIT_BUDGET (at least POSTED_BY_MIN_WAIT) and is not retried.
+    """
     logging.info(f"Starting scrape for brandpages: {brand_pages} with limit: {results_limit}")
-    all_reels = []
 
-    def fetch_reels(actor_id, payload_key):
+    def fetch_reels(actor_id, pages, wait, max_retries=3):
         url = f"https://api.apify.com/v2/acts/{actor_id}/run-sync-get-dataset-items"
         payload = {
-            payload_key: brand_pages,
+            "username": pages,
             "resultsLimit": min(results_limit, 1000),
             "proxy": {"useApifyProxy": True},
         }
-        params = {"token": APIFY_TOKEN, "waitForFinish": 600}
+        params = {"token": APIFY_TOKEN, "waitForFinish": wait}
         try:
-            return make_apify_request(url, params, payload)
+            return make_apify_request(url, params, payload, max_retries=max_retries)
         except Exception as e:
             logging.error(f"Failed to fetch from actor {actor_id}: {e}")
             return []
 
-    # Use a thread pool to fetch from both actors in parallel
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        # Fetch reels POSTED BY the brandpage
-        posted_by_future = executor.submit(fetch_reels, BRANDPAGE_ACTOR_ID, "username")
-        # Fetch reels where the brandpage is TAGGED (often includes collaborations)
-        tagged_in_future = executor.submit(fetch_reels, TAGGED_ACTOR_ID, "username")
-
-        all_reels.extend(posted_by_future.result())
-        all_reels.extend(tagged_in_future.result())
-
-    logging.info(f"Fetched {len(all_reels)} reels from Apify")
-
-    # Deduplicate reels using a dictionary to preserve order
-    unique_reels = {}
-    for item in all_reels:
-        key = (item.get("shortCode"), item.get("ownerUsername"))
-        unique_reels[key] = item
-
-    logging.info(f"Deduplicated to {len(unique_reels)} unique reels")
-
-    # Process data and prepare for CSV
+    seen_keys = set()
+    reels_per_page = dict.fromkeys(brand_pages, 0)
     processed_data = []
-    for item in unique_reels.values():
-        # Determine which of our input brandpages is relevant for this reel
-        bp = next((p for p in brand_pages if p == item.get("ownerUsername") or any(c.get("username") == p for c in item.get("coauthorProducers", []))), None)
-        if not bp:
-            continue
-        reel_url = item.get("url", "")
-        comments = item.get("commentsCount", "")
-        likes = item.get("likesCount", "")
-
-        profile_url = f"https://www.instagram.com/{bp}/"
-        collabs = item.get("coauthorProducers", []) or []
-        main_user = item.get("ownerUsername", "")
-
-        # Case 1: The brandpage we are searching for IS the owner of the reel
-        if bp == main_user and collabs:
-            for collab in collabs:
-                collab_username = collab.get("username", "")
-                collab_url = f"https://www.instagram.com/{collab_username}/"
-                if collab_username and collab_username != bp:
-                    processed_data.append({"brandpage": bp, "insta profile url": profile_url, "collaborated account url": collab_url, "reel url": reel_url, "likes": likes, "comments": comments})
-
-        # Case 2: The brandpage we are searching for IS a collaborator on a reel owned by someone else
-        elif main_user and main_user != bp:
-            main_url = f"https://www.instagram.com/{main_user}/"
-            processed_data.append({"brandpage": bp, "insta profile url": profile_url, "collaborated account url": main_url, "reel url": reel_url, "likes": likes, "comments": comments})
 
+    def collect(items):
+        for item in items:
+            # Deduplicate reels returned by both actors
+            key = (item.get("shortCode"), item.get("ownerUsername"))
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+
+            collabs = item.get("coauthorProducers", []) or []
+            main_user = item.get("ownerUsername", "")
+
+            # Determine which of our input brandpages is relevant for this reel
+            bp = next((p for p in brand_pages if p == main_user or any(c.get("username") == p for c in collabs)), None)
+            if not bp or reels_per_page[bp] >= results_limit:
+                continue
+            reel_url = item.get("url", "")
+            comments = item.get("commentsCount", "")
+            likes = item.get("likesCount", "")
+            profile_url = f"https://www.instagram.com/{bp}/"
+
+            # Case 1: The brandpage we are searching for IS the owner of the reel
+            if bp == main_user:
+                collab_users = [c.get("username", "") for c in collabs]
+                collab_users = [u for u in collab_users if u and u != bp]
+            # Case 2: The brandpage we are searching for IS a collaborator on a reel owned by someone else
+            else:
+                collab_users = [main_user] if main_user else []
+
+            for collab_username in collab_users:
+                processed_data.append({"brandpage": bp, "insta profile url": profile_url, "collaborated account url": f"https://www.instagram.com/{collab_username}/", "reel url": reel_url, "likes": likes, "comments": comments})
+            if collab_users:
+                reels_per_page[bp] += 1
+
+    # Fetch reels where the brandpage is TAGGED (often includes collaborations)
+    started = time.monotonic()
+    tagged_in = fetch_reels(TAGGED_ACTOR_ID, brand_pages, REELS_WAIT_BUDGET)
+    collect(tagged_in)
+
+    # Fetch reels POSTED BY the brandpages that still need more collaborations
+    short_pages = [bp for bp in brand_pages if reels_per_page[bp] < results_limit]
+    posted_by = []
+    if short_pages:
+        wait = max(POSTED_BY_MIN_WAIT, int(REELS_WAIT_BUDGET - (time.monotonic() - started)))
+        posted_by = fetch_reels(BRANDPAGE_ACTOR_ID, short_pages, wait, max_retries=1)
+    collect(posted_by)
+
+    logging.info(f"Fetched {len(tagged_in) + len(posted_by)} reels from Apify; posted-by actor asked for {len(short_pages)}/{len(brand_pages)} brandpages")
+    logging.info(f"Deduplicated to {len(seen_keys)} unique reels")
     logging.info(f"Identified {len(processed_data)} collaborated reels")
 
     # Generate CSV content
@@ -102,7 +116,7 @@ def brandpage_reels():
         if len(brandpages) > 10:
             brandpages = brandpages[:10]
 
-        results_limit = max(1, min(int(request.form.get("limit", 1000)), 1000))
+        results_limit = parse_limit(request.form.get("limit"), 1000)
 
         # Run the scraping task synchronously
         csv_content = scrape_brandpage_reels(brandpages, results_limit)
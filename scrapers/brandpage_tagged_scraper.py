@@ -3,7 +3,7 @@ import csv
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import Blueprint, request, Response, send_file
 import logging
-from utils import parse_csv_column, make_apify_request
+from utils import parse_csv_column, parse_limit, make_apify_request
 from config import APIFY_TOKEN, TAGGED_ACTOR_ID
 
 bp_brandpage_tagged = Blueprint("brandpage_tagged", __name__)
@@ -42,7 +42,8 @@ def scrape_brandpage_tagged(brandpages: list, limit: int):
             bp = future_to_page[future]
             try:
                 tagged_posts = future.result(timeout=150)
-                for post in tagged_posts:
+                # The actor may return more than requested; cap rows per brandpage
+                for post in tagged_posts[:limit]:
                     writer.writerow({
                         "brandpage": bp,
                         "owner_username": post.get("ownerUsername", ""),
@@ -77,7 +78,7 @@ def brandpage_tagged():
         if len(brandpages) > 10:
             brandpages = brandpages[:10]
 
-        limit = 1000
+        limit = parse_limit(request.form.get("limit"), 1000)
 
         # Run the scraping task synchronously
         csv_content = scrape_brandpage_tagged(brandpages, limit)
@@ -4,7 +4,7 @@ import typing as t
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import Blueprint, request, Response, send_file
 import logging
-from utils import normalize_hashtags, parse_csv_column, make_apify_request
+from utils import normalize_hashtags, parse_csv_column, parse_limit, make_apify_request
 from config import APIFY_TOKEN, HASHTAG_ACTOR_ID
 
 bp_hashtag = Blueprint("hashtag_scraper", __name__)
@@ -85,7 +85,7 @@ def fetch_hashtag():
             return Response("Provide at least one hashtag", status=400)
 
         # Max items per hashtag
-        max_items = max(1, min(int(request.form.get("limit", 20)), 1000))
+        max_items = parse_limit(request.form.get("limit"), 20)
         if max_items > 500:
             logging.warning(f"Requesting {max_items} items may cause timeouts.")
 
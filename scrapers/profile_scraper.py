@@ -1,6 +1,9 @@
 import io
 import csv
 import os
+import math
+import requests
+from urllib.parse import quote
 from flask import Blueprint, request, Response, send_file
 import logging
 from utils import make_apify_request, extract_contact_info_from_bio
@@ -22,8 +25,77 @@ def get_category(followers: int) -> str:
     else:
         return "mega"
 
+# ----------------- Filter Options -----------------
+CATEGORIES = ("nano", "micro", "mid-tier", "macro", "mega")
+PROFILE_BATCH_MIN = 25  # smallest per-input actor batch when filters may reject profiles
+PROFILE_MAX_ROUNDS = 3  # actor calls per request when a per-input cap is set
+
+def _parse_int(form_data: dict, field: str, minimum: int):
+    value = (form_data.get(field) or "").strip()
+    if not value:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"'{field}' must be a whole number")
+    if number < minimum:
+        raise ValueError(f"'{field}' must be at least {minimum}")
+    return number
+
+def parse_filters(form_data: dict) -> dict:
+    """Read and validate the optional profile filters from the submitted form.
+
+    Raises ValueError with a user-facing message on invalid input.
+    """
+    categories = form_data.get("categories") or []
+    if isinstance(categories, str):
+        categories = [c.strip() for c in categories.split(",")]
+    categories = {c for c in categories if c}
+    unknown = categories - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(sorted(unknown))}")
+
+    filters = {
+        "min_followers": _parse_int(form_data, "min_followers", 0),
+        "max_followers": _parse_int(form_data, "max_followers", 0),
+        "categories": categories,
+        # Checkboxes submit "1" when ticked and nothing otherwise
+        "has_email": form_data.get("has_email") == "1",
+        "has_phone": form_data.get("has_phone") == "1",
+        "max_per_query": _parse_int(form_data, "max_per_query", 1),
+    }
+    if (filters["min_followers"] is not None and filters["max_followers"] is not None
+            and filters["min_followers"] > filters["max_followers"]):
+        raise ValueError("'min_followers' cannot be greater than 'max_followers'")
+    return filters
+
+def has_profile_filters(filters: dict) -> bool:
+    return bool(
+        filters["min_followers"] is not None or filters["max_followers"] is not None
+        or filters["categories"] or filters["has_email"] or filters["has_phone"]
+    )
+
+def profile_passes(filters: dict, followers: int, category: str, email: str, phone: str) -> bool:
+    if filters["min_followers"] is not None and followers < filters["min_followers"]:
+        return False
+    if filters["max_followers"] is not None and followers > filters["max_followers"]:
+        return False
+    if filters["categories"] and category not in filters["categories"]:
+        return False
+    if filters["has_email"] and not email:
+        return False
+    if filters["has_phone"] and not phone:
+        return False
+    return True
+
 # ----------------- Scraper Function -----------------
 def filter_and_scrape_profiles(csv_file_content: str, form_data: dict):
+    """Fetch, filter and export the profiles referenced by an exported CSV.
+
+    Returns (csv_content, warning). warning is None unless a later profile
+    batch failed, in which case it describes the partial result. Raises
+    ValueError for invalid filters or an unrecognized input CSV.
+    """
     csv_file = io.StringIO(csv_file_content)
     reader = csv.DictReader(csv_file)
     headers = set(h.strip().lower() for h in reader.fieldnames)
@@ -58,12 +130,20 @@ def filter_and_scrape_profiles(csv_file_content: str, form_data: dict):
     else:
         raise ValueError("Unrecognized CSV format. Could not find required columns.")
 
-    usernames = list(set(usernames))
+    usernames = list(dict.fromkeys(usernames))
     if not usernames:
         raise ValueError("No valid usernames found in CSV file.")
 
-    # Fetch profiles
-    profiles = fetch_profiles_sync(usernames)
+    filters = parse_filters(form_data)
+    filtering = has_profile_filters(filters)
+    max_per_query = filters["max_per_query"]
+
+    # Group usernames by the input (hashtag/brandpage) they came from so that
+    # the per-input cap can be applied before profiles are fetched
+    pending = {}
+    for u in usernames:
+        pending.setdefault(query_map.get(u, form_data.get("query", "")), []).append(u)
+    kept_per_query = dict.fromkeys(pending, 0)
 
     # Prepare CSV
     output = io.StringIO()
@@ -74,26 +154,76 @@ def filter_and_scrape_profiles(csv_file_content: str, form_data: dict):
     ])
 
     rows_to_append = []
-    for p in profiles:
-        username = p.get("username", "")
-        bio = p.get("biography", "") or ""
-        email, phone = extract_contact_info_from_bio(bio)
-        query_value = query_map.get(username, form_data.get("query", ""))
+    requested = passed = 0
+    warning = None
+    for round_no in range(PROFILE_MAX_ROUNDS):
+        if not pending:
+            break
+        # Without a cap every username is fetched in one call. With a cap, each
+        # input asks for what it still needs; when filters may reject profiles
+        # the batch grows each round (at least doubling, or sized from the pass
+        # rate seen so far) and the last round takes everything that is left.
+        batch = []
+        for query, queue in list(pending.items()):
+            if max_per_query is None or (filtering and round_no == PROFILE_MAX_ROUNDS - 1):
+                take = len(queue)
+            else:
+                need = max_per_query - kept_per_query[query]
+                take = need
+                if filtering:
+                    take = max(need, PROFILE_BATCH_MIN << round_no)
+                    if passed:
+                        take = max(take, math.ceil(need * requested / passed))
+            batch.extend(queue[:take])
+            del queue[:take]
+            if not queue:
+                del pending[query]
+
+        try:
+            profiles = fetch_profiles_sync(batch)
+        except Exception:
+            if not round_no:
+                raise
+            # Keep what earlier rounds collected rather than failing the request
+            short = [q for q in kept_per_query if kept_per_query[q] < max_per_query]
+            warning = (f"Profile lookup failed after {round_no} of up to {PROFILE_MAX_ROUNDS} batches; "
+                       f"returning {len(rows_to_append)} rows. Cap not reached for: {', '.join(short)}")
+            logging.error(warning, exc_info=True)
+            break
+        requested += len(batch)
+
+        for p in profiles:
+            username = p.get("username", "")
+            query_value = query_map.get(username, form_data.get("query", ""))
+            if max_per_query is not None and kept_per_query.get(query_value, 0) >= max_per_query:
+                continue
+
+            bio = p.get("biography", "") or ""
+            email, phone = extract_contact_info_from_bio(bio)
+            followers = int(p.get("followersCount") or 0)
+            category = get_category(followers)
+            if filtering and not profile_passes(filters, followers, category, email, phone):
+                continue
+            passed += 1
 
-        followers = int(p.get("followersCount") or 0)
-        category = get_category(followers)
+            row_data = [
+                csv_type, query_value, username, f"https://www.instagram.com/{username}/",
+                followers, category, p.get("postsCount", ""),
+                bio.replace("\n", " "), email, phone
+            ]
+            writer.writerow(row_data)
+            rows_to_append.append(row_data)
+            kept_per_query[query_value] = kept_per_query.get(query_value, 0) + 1
 
-        row_data = [
-            csv_type, query_value, username, f"https://www.instagram.com/{username}/",
-            followers, category, p.get("postsCount", ""),
-            bio.replace("\n", " "), email, phone
-        ]
-        writer.writerow(row_data)
-        rows_to_append.append(row_data)
+        if max_per_query is not None:
+            for query in [q for q in pending if kept_per_query[q] >= max_per_query]:
+                del pending[query]
 
-    append_to_gsheet(rows_to_append)
+    logging.info(f"Kept {len(rows_to_append)} profiles after filtering")
+    if rows_to_append:
+        append_to_gsheet(rows_to_append)
 
-    return output.getvalue()
+    return output.getvalue(), warning
 
 def fetch_profiles_sync(usernames):
     url = f"https://api.apify.com/v2/acts/{PROFILE_ACTOR_ID}/run-sync-get-dataset-items"
@@ -116,13 +246,24 @@ def filter_csv():
         csv_file = request.files["csv_file"]
         csv_content = csv_file.stream.read().decode("utf-8")
         form_data = request.form.to_dict()
+        form_data["categories"] = request.form.getlist("categories")
 
         # Run the filtering task synchronously
-        csv_output_content = filter_and_scrape_profiles(csv_content, form_data)
+        try:
+            csv_output_content, warning = filter_and_scrape_profiles(csv_content, form_data)
+        except requests.exceptions.RequestException:
+            raise  # Apify failures are server errors, even when they subclass ValueError
+        except ValueError as e:
+            # Invalid filters or an unrecognized/empty input CSV
+            return Response(str(e), status=400)
 
         filename = (request.form.get("filename") or "filtered_profiles") + ".csv"
         csv_bytes = io.BytesIO(csv_output_content.encode("utf-8"))
-        return send_file(csv_bytes, mimetype="text/csv", as_attachment=True, download_name=filename)
+        response = send_file(csv_bytes, mimetype="text/csv", as_attachment=True, download_name=filename)
+        if warning:
+            # Header values must be latin-1; the page decodes this with decodeURIComponent
+            response.headers["X-Partial-Results"] = quote(warning)
+        return response
 
     except Exception as e:
         logging.error(f"Error in /filter-csv route: {e}", exc_info=True)
@@ -1,7 +1,7 @@
 import io
 import csv
 from flask import Blueprint, request, Response, send_file
-from utils import make_apify_request, parse_csv_column
+from utils import make_apify_request, parse_csv_column, parse_limit
 from config import APIFY_TOKEN, YOUTUBE_ACTOR_ID
 
 bp_youtube = Blueprint("youtube_scraper", __name__)
@@ -58,7 +58,7 @@ def youtube_keyword():
         if not keywords:
             return Response("Provide at least one keyword", status=400)
 
-        results_count = max(1, min(int(request.form.get("limit", 1000)), 1000))
+        results_count = parse_limit(request.form.get("limit"), 1000)
 
         # Run the scraping task synchronously
         csv_content = scrape_youtube_keywords(keywords, results_count)
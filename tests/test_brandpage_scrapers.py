@@ -0,0 +1,103 @@
+import csv
+import io
+from unittest import mock
+
+import pytest
+from flask import Flask
+
+import utils
+from scrapers import brandpage_reels_scraper, brandpage_tagged_scraper
+
+
+def make_reel(code, owner, coauthors=(), likes=1):
+    return {"shortCode": code, "ownerUsername": owner, "coauthorProducers": [{"username": c} for c in coauthors],
+            "url": f"https://www.instagram.com/reel/{code}/", "likesCount": likes, "commentsCount": 0}
+
+
+def run_reels(brand_pages, limit, tagged, posted):
+    """Run scrape_brandpage_reels against fake actors; return (csv rows, actor calls)."""
+    calls = []
+
+    def fake_request(url, params, payload, max_retries=3):
+        actor = "tagged" if "/acts/tagged/" in url else "posted"
+        calls.append({"actor": actor, "pages": payload["username"], "wait": params["waitForFinish"], "max_retries": max_retries})
+        return tagged if actor == "tagged" else posted
+
+    with mock.patch.object(brandpage_reels_scraper, "TAGGED_ACTOR_ID", "tagged"), \
+         mock.patch.object(brandpage_reels_scraper, "BRANDPAGE_ACTOR_ID", "posted"), \
+         mock.patch.object(brandpage_reels_scraper, "make_apify_request", side_effect=fake_request):
+        content = brandpage_reels_scraper.scrape_brandpage_reels(brand_pages, limit)
+    return list(csv.DictReader(io.StringIO(content))), calls
+
+
+# ----------------- scrape_brandpage_reels -----------------
+def test_posted_by_actor_skipped_when_tagged_reels_cover_every_page():
+    tagged = [make_reel("a1", "creator1", ["bp1"]), make_reel("b1", "creator2", ["bp2"])]
+    rows, calls = run_reels(["bp1", "bp2"], 1, tagged, [make_reel("x", "bp1", ["other"])])
+    assert [c["actor"] for c in calls] == ["tagged"]
+    assert len(rows) == 2
+
+
+def test_posted_by_actor_only_gets_short_pages_with_bounded_wait():
+    tagged = [make_reel("a1", "creator1", ["bp1"]), make_reel("a2", "creator2", ["bp1"])]
+    posted = [make_reel("b1", "bp2", ["creator3"])]
+    rows, calls = run_reels(["bp1", "bp2", "bp3"], 2, tagged, posted)
+    assert [c["actor"] for c in calls] == ["tagged", "posted"]
+    assert calls[1]["pages"] == ["bp2", "bp3"]
+    assert calls[1]["max_retries"] == 1
+    assert brandpage_reels_scraper.POSTED_BY_MIN_WAIT <= calls[1]["wait"] <= brandpage_reels_scraper.REELS_WAIT_BUDGET
+    assert [r["brandpage"] for r in rows] == ["bp1", "bp1", "bp2"]
+
+
+def test_reels_per_page_cap():
+    tagged = [make_reel(f"a{i}", f"creator{i}", ["bp1"]) for i in range(5)]
+    rows, _ = run_reels(["bp1"], 3, tagged, [])
+    assert [r["reel url"] for r in rows] == [f"https://www.instagram.com/reel/a{i}/" for i in range(3)]
+
+
+def test_duplicate_reels_keep_first_copy():
+    tagged = [make_reel("a1", "creator1", ["bp1"], likes=10)]
+    posted = [make_reel("a1", "creator1", ["bp1"], likes=99)]
+    rows, _ = run_reels(["bp1"], 5, tagged, posted)
+    assert len(rows) == 1
+    assert rows[0]["likes"] == "10"
+
+
+def test_owned_reel_with_several_coauthors_keeps_all_rows():
+    posted = [make_reel("b1", "bp1", ["c1", "c2", "bp1", "c3"]), make_reel("b2", "bp1", ["c4"])]
+    rows, _ = run_reels(["bp1"], 1, [], posted)
+    assert [r["collaborated account url"] for r in rows] == [f"https://www.instagram.com/{c}/" for c in ("c1", "c2", "c3")]
+
+
+def test_reels_without_collaborations_are_skipped():
+    posted = [make_reel("b1", "bp1"), make_reel("b2", "stranger", ["other"])]
+    rows, _ = run_reels(["bp1"], 5, [], posted)
+    assert rows == []
+
+
+# ----------------- /brandpage-tagged -----------------
+def post_tagged(**form):
+    app = Flask(__name__)
+    app.register_blueprint(brandpage_tagged_scraper.bp_brandpage_tagged)
+    return app.test_client().post("/brandpage-tagged", data={"brandpage": "bp1", **form})
+
+
+@pytest.mark.parametrize("limit, expected", [("2", 2), ("", 1000), ("abc", 1000), ("5000", 1000), ("0", 1)])
+def test_tagged_route_reads_limit(limit, expected):
+    with mock.patch.object(brandpage_tagged_scraper, "make_apify_request", return_value=[]) as request:
+        response = post_tagged(limit=limit)
+    assert response.status_code == 200
+    assert request.call_args[0][2]["resultsLimit"] == expected
+
+
+def test_tagged_rows_are_capped_at_limit():
+    posts = [{"ownerUsername": f"u{i}", "url": f"r{i}"} for i in range(5)]
+    with mock.patch.object(brandpage_tagged_scraper, "make_apify_request", return_value=posts):
+        response = post_tagged(limit="3")
+    rows = list(csv.DictReader(io.StringIO(response.data.decode())))
+    assert [r["owner_username"] for r in rows] == ["u0", "u1", "u2"]
+
+
+@pytest.mark.parametrize("value, expected", [(None, 20), ("", 20), (" 7 ", 7), ("x", 20), ("-3", 1), ("2000", 1000)])
+def test_parse_limit(value, expected):
+    assert utils.parse_limit(value, 20) == expected
@@ -0,0 +1,177 @@
+import io
+from unittest import mock
+
+import pytest
+import requests
+from flask import Flask
+
+from scrapers import profile_scraper
+
+HEADER = "hashtag,username,user_link,caption_text\n"
+
+
+def make_csv(rows):
+    return HEADER + "".join(f"{tag},{user},,\n" for tag, user in rows)
+
+
+def make_profile(username, followers=20_000, bio=""):
+    return {"username": username, "followersCount": followers, "biography": bio, "postsCount": 1}
+
+
+def run_filter(csv_content, form_data, fetch):
+    """Run the filter with the actor and Sheets patched; return (csv rows, batches, sheet rows, warning)."""
+    batches = []
+
+    def fake_fetch(usernames):
+        batches.append(list(usernames))
+        return fetch(usernames)
+
+    with mock.patch.object(profile_scraper, "fetch_profiles_sync", side_effect=fake_fetch), \
+         mock.patch.object(profile_scraper, "append_to_gsheet") as append:
+        output, warning = profile_scraper.filter_and_scrape_profiles(csv_content, form_data)
+    sheet_rows = append.call_args[0][0] if append.called else []
+    return output.strip().splitlines()[1:], batches, sheet_rows, warning
+
+
+# ----------------- parse_filters -----------------
+def test_parse_filters_defaults_to_no_filters():
+    filters = profile_scraper.parse_filters({})
+    assert not profile_scraper.has_profile_filters(filters)
+    assert filters["max_per_query"] is None
+
+
+@pytest.mark.parametrize("form_data", [
+    {"min_followers": "abc"},
+    {"max_per_query": "1.5"},
+    {"max_per_query": "0"},
+    {"min_followers": "-1"},
+    {"min_followers": "10", "max_followers": "5"},
+    {"categories": ["giga"]},
+])
+def test_parse_filters_rejects_invalid_input(form_data):
+    with pytest.raises(ValueError):
+        profile_scraper.parse_filters(form_data)
+
+
+@pytest.mark.parametrize("value, expected", [("1", True), ("0", False), ("false", False), ("", False)])
+def test_contact_checkboxes_only_match_checkbox_value(value, expected):
+    filters = profile_scraper.parse_filters({"has_email": value, "has_phone": value})
+    assert filters["has_email"] is expected
+    assert filters["has_phone"] is expected
+
+
+def test_profile_passes():
+    filters = profile_scraper.parse_filters({"min_followers": "1000", "categories": ["micro"], "has_email": "1"})
+    assert profile_scraper.profile_passes(filters, 20_000, "micro", "a@b.co", "")
+    assert not profile_scraper.profile_passes(filters, 500, "nano", "a@b.co", "")
+    assert not profile_scraper.profile_passes(filters, 200_000, "mid-tier", "a@b.co", "")
+    assert not profile_scraper.profile_passes(filters, 20_000, "micro", "", "")
+
+
+# ----------------- filter_and_scrape_profiles -----------------
+def test_cap_without_filters_fetches_only_what_is_needed():
+    csv_content = make_csv([("x", f"x{i}") for i in range(50)] + [("y", f"y{i}") for i in range(50)])
+    rows, batches, sheet_rows, warning = run_filter(csv_content, {"max_per_query": "3"}, lambda us: [make_profile(u) for u in us])
+    assert batches == [["x0", "x1", "x2", "y0", "y1", "y2"]]
+    assert len(rows) == len(sheet_rows) == 6
+    assert warning is None
+
+
+def test_filters_reject_profiles():
+    csv_content = make_csv([("x", f"x{i}") for i in range(10)])
+    fetch = lambda us: [make_profile(u, followers=int(u[1:]) * 100_000) for u in us]
+    rows, batches, sheet_rows, _ = run_filter(csv_content, {"categories": ["micro", "mid-tier"]}, fetch)
+    assert len(batches) == 1
+    assert [r.split(",")[2] for r in rows] == ['"x1"', '"x2"', '"x3"', '"x4"']
+    assert len(sheet_rows) == 4
+
+
+def test_no_rows_skips_sheet_append():
+    csv_content = make_csv([("x", "x1")])
+    rows, _, sheet_rows, _ = run_filter(csv_content, {"has_phone": "1"}, lambda us: [make_profile(u) for u in us])
+    assert rows == [] and sheet_rows == []
+
+
+def test_actor_returning_fewer_profiles_triggers_follow_up_batch():
+    csv_content = make_csv([("x", f"x{i}") for i in range(10)])
+    missing = {"x0", "x1"}
+    fetch = lambda us: [make_profile(u) for u in us if u not in missing]
+    rows, batches, _, _ = run_filter(csv_content, {"max_per_query": "4"}, fetch)
+    assert batches == [["x0", "x1", "x2", "x3"], ["x4", "x5"]]
+    assert len(rows) == 4
+
+
+def test_selective_filter_with_cap_uses_bounded_growing_batches():
+    csv_content = make_csv([(tag, f"{tag}{i}") for tag in ("x", "y") for i in range(1000)])
+    # About 1% of profiles are micro
+    fetch = lambda us: [make_profile(u, followers=20_000 if int(u[1:]) % 100 == 99 else 100) for u in us]
+    rows, batches, _, _ = run_filter(csv_content, {"max_per_query": "10", "categories": ["micro"]}, fetch)
+    assert len(batches) <= profile_scraper.PROFILE_MAX_ROUNDS
+    assert [len(b) for b in batches] == sorted(len(b) for b in batches)
+    assert len(rows) == 20
+
+
+def test_failure_in_later_round_keeps_partial_results():
+    csv_content = make_csv([("x", f"x{i}") for i in range(100)])
+    calls = []
+
+    def fetch(usernames):
+        calls.append(usernames)
+        if len(calls) > 1:
+            raise RuntimeError("actor timed out")
+        return [make_profile(u, bio="a@b.co" if u == "x0" else "") for u in usernames]
+
+    rows, _, sheet_rows, warning = run_filter(csv_content, {"max_per_query": "5", "has_email": "1"}, fetch)
+    assert len(calls) == 2
+    assert len(rows) == len(sheet_rows) == 1
+    assert "returning 1 rows" in warning and "x" in warning.split("Cap not reached for:")[1]
+
+
+def test_failure_in_first_round_raises():
+    csv_content = make_csv([("x", "x0")])
+    with pytest.raises(RuntimeError):
+        run_filter(csv_content, {}, mock.Mock(side_effect=RuntimeError("boom")))
+
+
+# ----------------- /filter-csv route -----------------
+def post_filter_csv(csv_content, **form):
+    app = Flask(__name__)
+    app.register_blueprint(profile_scraper.bp_profile)
+    data = {"csv_file": (io.BytesIO(csv_content.encode()), "in.csv"), **form}
+    return app.test_client().post("/filter-csv", data=data, content_type="multipart/form-data")
+
+
+@pytest.mark.parametrize("csv_content, form, message", [
+    (make_csv([("x", "x0")]), {"min_followers": "abc"}, b"min_followers"),
+    ("foo,bar\n1,2\n", {}, b"Unrecognized CSV format"),
+    (HEADER, {}, b"No valid usernames"),
+])
+def test_route_returns_400_for_invalid_input(csv_content, form, message):
+    with mock.patch.object(profile_scraper, "fetch_profiles_sync") as fetch:
+        response = post_filter_csv(csv_content, **form)
+    assert response.status_code == 400
+    assert message in response.data
+    fetch.assert_not_called()
+
+
+def test_route_flags_partial_results():
+    calls = []
+
+    def fetch(usernames):
+        calls.append(usernames)
+        if len(calls) > 1:
+            raise RuntimeError("actor timed out")
+        return [make_profile(u, bio="a@b.co" if u == "x0" else "") for u in usernames]
+
+    csv_content = make_csv([("x", f"x{i}") for i in range(100)])
+    with mock.patch.object(profile_scraper, "fetch_profiles_sync", side_effect=fetch), \
+         mock.patch.object(profile_scraper, "append_to_gsheet"):
+        response = post_filter_csv(csv_content, max_per_query="5", has_email="1")
+    assert response.status_code == 200
+    assert "Cap%20not%20reached" in response.headers["X-Partial-Results"]
+
+
+def test_route_returns_500_when_actor_fails():
+    with mock.patch.object(profile_scraper, "fetch_profiles_sync", side_effect=requests.exceptions.JSONDecodeError("bad", "", 0)):
+        response = post_filter_csv(make_csv([("x", "x0")]))
+    assert response.status_code == 500
@@ -24,6 +24,14 @@ def parse_csv_column(file_storage, column: str) -> t.List[str]:
         raise ValueError(f"CSV must contain '{column}' column")
     return [row[column].strip() for row in reader if row[column].strip()]
 
+def parse_limit(value, default: int, maximum: int = 1000) -> int:
+    """Clamp a form 'limit' value to 1..maximum, using default when empty or not a number."""
+    try:
+        limit = int((value or "").strip())
+    except ValueError:
+        return default
+    return max(1, min(limit, maximum))
+
 # ----------------------------
 # Apify Request Utility
 # ----------------------------